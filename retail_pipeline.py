@@ -1,14 +1,25 @@
 import os
 import io
 import logging
+import re
 import sqlite3
+import numpy as np
 import pandas as pd
 import argparse
+import asyncio
 from datetime import datetime, timedelta
 import sys
-import hashlib
+import xxhash
 from dotenv import load_dotenv
 from azure.storage.blob import BlobServiceClient
+from azure.storage.blob.aio import BlobServiceClient as AsyncBlobServiceClient
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from pyarrow import csv as pa_csv
+except ImportError:  # pyarrow is optional; fall back to the pandas C engine
+    pa = None
 
 # Initialize environment variables
 load_dotenv()
@@ -17,6 +28,37 @@ load_dotenv()
 CONNECTION_STRING = os.getenv("AZURE_CONNECTION_STRING")
 CONTAINER_NAME = "76byj86oc9kf"
 DB_FILE = "retail_data.db"  # SQLite database file
+ACCOUNT_MAP_CACHE = "account_map.npz"  # client id -> account_id lookup cache
+DENSE_ID_FACTOR = 4  # max client id / client count allowed for array lookup
+TRANSACTION_CACHE_DIR = ".cache"  # parsed hourly files, keyed by blob ETag
+TRANSACTION_CACHE_VERSION = 2  # bump whenever parsing changes the frame
+
+# Column types for the hourly transaction CSVs, skipping type inference
+TRANSACTION_CSV_TYPES = {
+    "transaction_id": "int64", "client_id": "int64", "product_id": "int64",
+    "store_id": "int64", "quantity": "int64",
+    "date": "string", "hour": "string", "minute": "string"
+}
+# Keep opening hours as text (pyarrow would infer them as times)
+STORE_CSV_TYPES = {"opening": "string", "closing": "string"}
+
+# Store coordinates come as "(lat,lng)"
+LATLNG_PATTERN = re.compile(r"\(?\s*([-+]?[\d.]+)\s*,\s*([-+]?[\d.]+)\s*\)?")
+
+# Columns loaded into the transactions table, in insert order
+TRANSACTION_COLUMNS = [
+    "transaction_id", "client_id", "product_id", "store_id",
+    "transaction_time", "quantity", "account_id", "process_date"
+]
+# Kept constant so sqlite3 reuses the prepared statement for every file
+INSERT_TX_SQL = (
+    f"INSERT INTO transactions_stg ({', '.join(TRANSACTION_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(TRANSACTION_COLUMNS))})"
+)
+PUBLISH_TX_SQL = (
+    f"INSERT INTO transactions ({', '.join(TRANSACTION_COLUMNS)}) "
+    f"SELECT {', '.join(TRANSACTION_COLUMNS)} FROM transactions_stg"
+)
 
 # Configure logging
 logging.basicConfig(
@@ -26,8 +68,35 @@ logging.basicConfig(
 )
 
 
-def compute_file_hash(data_bytes):
-    return hashlib.sha256(data_bytes).hexdigest()
+def read_csv_bytes(blob_data, column_types=None):
+    """Parse a ';'-separated CSV blob, using pyarrow when it is installed"""
+    column_types = column_types or {}
+    if pa is None:
+        # Only pin text columns: a plain int64 dtype rejects blank cells,
+        # whereas inference yields float64 with NaN like pyarrow does
+        dtype = {col: str for col, t in column_types.items() if t == "string"}  # noqa: E501
+        return pd.read_csv(io.BytesIO(blob_data), sep=';', dtype=dtype or None)  # noqa: E501
+
+    table = pa_csv.read_csv(
+        pa.BufferReader(blob_data),
+        parse_options=pa_csv.ParseOptions(delimiter=';'),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={col: pa.type_for_alias(t) for col, t in column_types.items()},  # noqa: E501
+            strings_can_be_null=True  # match pandas: empty fields become NaN
+        )
+    )
+    return table.to_pandas()
+
+
+def download_with_hash(blob_client):
+    """Download a blob, hashing each chunk as it arrives"""
+    # Only used for change detection, so a non-cryptographic hash is enough
+    file_hash = xxhash.xxh3_128()
+    chunks = []
+    for chunk in blob_client.download_blob().chunks():
+        file_hash.update(chunk)
+        chunks.append(chunk)
+    return b"".join(chunks), file_hash.hexdigest()
 
 
 def log_table_exist(conn):
@@ -35,14 +104,25 @@ def log_table_exist(conn):
         CREATE TABLE IF NOT EXISTS file_ingestion_log (
             file_name TEXT PRIMARY KEY,
             file_hash TEXT NOT NULL,
-            ingestion_time DATETIME NOT NULL
+            ingestion_time DATETIME NOT NULL,
+            etag TEXT
         )
     """)
+    # Databases created before the etag column was introduced
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(file_ingestion_log)")}  # noqa: E501
+    if "etag" not in columns:
+        conn.execute("ALTER TABLE file_ingestion_log ADD COLUMN etag TEXT")
     conn.commit()
 
 
+def get_stored_etag(file_name, conn):
+    cur = conn.cursor()
+    cur.execute("SELECT etag FROM file_ingestion_log WHERE file_name = ?", (file_name,))  # noqa: E501
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
 def has_file_changed(file_name, new_hash, conn):
-    log_table_exist(conn)
     cur = conn.cursor()
     cur.execute("SELECT file_hash FROM file_ingestion_log WHERE file_name = ?", (file_name,))  # noqa: E501
     row = cur.fetchone()
@@ -51,17 +131,23 @@ def has_file_changed(file_name, new_hash, conn):
     return row[0] != new_hash
 
 
-def record_file_hash(file_name, file_hash, conn):
-    log_table_exist(conn)
+def record_file_etags(rows, conn):
+    """Update only the ETag for (etag, file_name) rows of unchanged files"""
+    conn.executemany("UPDATE file_ingestion_log SET etag = ? WHERE file_name = ?", rows)  # noqa: E501
+
+
+def record_file_hashes(rows, conn):
+    """Upsert (file_name, file_hash, ingestion_time, etag) log rows"""
     cur = conn.cursor()
-    cur.execute("""
-        INSERT INTO file_ingestion_log (file_name, file_hash, ingestion_time)
-        VALUES (?, ?, ?)
+    cur.executemany("""
+        INSERT INTO file_ingestion_log
+            (file_name, file_hash, ingestion_time, etag)
+        VALUES (?, ?, ?, ?)
         ON CONFLICT(file_name) DO UPDATE SET
             file_hash = excluded.file_hash,
-            ingestion_time = excluded.ingestion_time
-    """, (file_name, file_hash, datetime.now()))
-    conn.commit()
+            ingestion_time = excluded.ingestion_time,
+            etag = excluded.etag
+    """, rows)
 
 
 def create_tables(conn):
@@ -111,6 +197,13 @@ def create_tables(conn):
     )
     """)
 
+    # process_date is stored as a plain YYYY-MM-DD string, so it can be
+    # compared (and indexed) directly
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tx_process_date ON transactions(process_date)")  # noqa: E501
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tx_client_id ON transactions(client_id)")  # noqa: E501
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tx_product_id ON transactions(product_id)")  # noqa: E501
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tx_store_id ON transactions(store_id)")  # noqa: E501
+
     log_table_exist(conn)
     conn.commit()
     logging.info("Database tables created/verified")
@@ -120,7 +213,7 @@ def date_check_in_transactions(conn, process_date):
     """Check if transactions exist for a given date"""
     cursor = conn.cursor()
     cursor.execute(
-        "SELECT 1 FROM transactions WHERE DATE(process_date) = ? LIMIT 1",
+        "SELECT 1 FROM transactions WHERE process_date = ? LIMIT 1",
         (process_date,)
     )
     return cursor.fetchone() is not None
@@ -130,15 +223,134 @@ def delete_transactions(conn, process_date):
     """Delete existing transactions for a given date"""
     cursor = conn.cursor()
     cursor.execute(
-        "DELETE FROM transactions WHERE DATE(process_date) = ?",
+        "DELETE FROM transactions WHERE process_date = ?",
         (process_date,)
     )
     deleted_count = cursor.rowcount
-    conn.commit()
     logging.info(f"Deleted {deleted_count} existing transactions for {process_date}")  # noqa: E501
     return deleted_count
 
 
+def transaction_blob_names(transaction_date):
+    """Hourly transaction file names for a given date"""
+    return [f"transactions_{transaction_date}_{hour}.csv" for hour in range(8, 21)]  # noqa: E501
+
+
+def transaction_cache_path(blob_name, etag):
+    """Local Parquet copy of a parsed transaction file for a given ETag"""
+    etag = etag.strip('"')  # ETags are returned quoted
+    file_name = f"{blob_name}.v{TRANSACTION_CACHE_VERSION}.{etag}.parquet"
+    return os.path.join(TRANSACTION_CACHE_DIR, file_name)
+
+
+async def _fetch_all(blob_client, etags):
+    """Fetch blobs concurrently as (etag, bytes); failed blobs map to None
+
+    etags maps each blob name to its current ETag. The bytes are None when a
+    Parquet copy for that ETag is already cached.
+    """
+    async def fetch(name, etag):
+        if pa is not None and os.path.exists(transaction_cache_path(name, etag)):  # noqa: E501
+            return etag, None
+        try:
+            downloader = await blob_client.get_blob_client(name).download_blob(max_concurrency=4)  # noqa: E501
+            return etag, await downloader.readall()
+        except Exception as e:
+            logging.error(f"Error downloading {name}: {str(e)}")
+            return None
+
+    async with asyncio.TaskGroup() as tg:
+        tasks = {name: tg.create_task(fetch(name, etag)) for name, etag in etags.items()}  # noqa: E501
+    return {name: task.result() for name, task in tasks.items()}
+
+
+async def fetch_transaction_blobs(transaction_date):
+    """Download the hourly transaction files for a date"""
+    async with AsyncBlobServiceClient.from_connection_string(CONNECTION_STRING) as blob_service:  # noqa: E501
+        blob_client = blob_service.get_container_client(CONTAINER_NAME)
+
+        # One listing call tells us which hours exist, and their ETags
+        prefix = f"transactions_{transaction_date}_"
+        existing = {
+            blob.name: blob.etag
+            async for blob in blob_client.list_blobs(name_starts_with=prefix)
+        }
+        etags = {
+            name: existing[name]
+            for name in transaction_blob_names(transaction_date)
+            if name in existing
+        }
+        return await _fetch_all(blob_client, etags)
+
+
+def read_account_map(conn):
+    """Client ids (int64) and their account_ids from the clients table"""
+    account_map = pd.read_sql("SELECT id, account_id FROM clients", conn)
+    account_map = account_map.dropna(subset=["id"])
+    ids = account_map["id"].to_numpy(dtype=np.int64)
+    return ids, account_map["account_id"].to_numpy(dtype=object)
+
+
+def build_account_lookup(ids, account_ids):
+    """Dense array indexed by client id, or an id-indexed Series if sparse"""
+    if len(ids) and ids.min() >= 0 and ids.max() <= DENSE_ID_FACTOR * len(ids):  # noqa: E501
+        account_arr = np.full(ids.max() + 1, None, dtype=object)
+        account_arr[ids] = account_ids
+        return account_arr
+
+    # Sparse, negative or no ids: fall back to a hashed lookup on the index
+    account_map = pd.Series(account_ids, index=ids)
+    return account_map[~account_map.index.duplicated(keep="last")]
+
+
+def load_account_lookup(conn):
+    """Account lookup, reused from disk while clients.csv is unchanged"""
+    cur = conn.cursor()
+    cur.execute("SELECT file_hash FROM file_ingestion_log WHERE file_name = ?", ("clients.csv",))  # noqa: E501
+    row = cur.fetchone()
+    clients_hash = row[0] if row else None
+
+    if clients_hash is not None and os.path.exists(ACCOUNT_MAP_CACHE):
+        try:
+            with np.load(ACCOUNT_MAP_CACHE, allow_pickle=False) as cache:
+                if cache["clients_hash"].item() == clients_hash:
+                    account_ids = cache["account_ids"].astype(object)
+                    account_ids[cache["account_null"]] = None
+                    return build_account_lookup(cache["ids"], account_ids)
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable {ACCOUNT_MAP_CACHE}: {str(e)}")  # noqa: E501
+
+    ids, account_ids = read_account_map(conn)
+    if clients_hash is not None:
+        # Plain string and bool arrays, so loading never has to unpickle
+        account_null = pd.isna(account_ids)
+        np.savez(
+            ACCOUNT_MAP_CACHE,
+            ids=ids,
+            account_ids=np.where(account_null, "", account_ids).astype(str),
+            account_null=account_null,
+            clients_hash=np.array(clients_hash)
+        )
+    return build_account_lookup(ids, account_ids)
+
+
+def lookup_account_ids(account_lookup, client_ids):
+    """Gather account_id for each client id; unknown or blank ids get None"""
+    account_ids = np.full(len(client_ids), None, dtype=object)
+    # Mask blank ids before the int cast, which is undefined for NaN
+    rows = np.flatnonzero(client_ids.notna().to_numpy())
+    ids = client_ids.to_numpy()[rows].astype(np.int64)
+
+    if isinstance(account_lookup, np.ndarray):
+        found = (ids >= 0) & (ids < len(account_lookup))
+        account_ids[rows[found]] = account_lookup[ids[found]]
+    else:
+        positions = account_lookup.index.get_indexer(ids)
+        found = positions >= 0
+        account_ids[rows[found]] = account_lookup.to_numpy()[positions[found]]  # noqa: E501
+    return account_ids
+
+
 def process_static_files(blob_client, conn):
     """Process and load static files into database"""
     static_files = {
@@ -147,91 +359,177 @@ def process_static_files(blob_client, conn):
         "stores.csv": "stores"
     }
 
+    # Log updates are written together once all files are processed
+    hash_rows = []
+    etag_rows = []
     for blob_name, table_name in static_files.items():
         try:
-            blob_data = blob_client.get_blob_client(blob_name).download_blob().readall()  # noqa: E501
-            file_hash = compute_file_hash(blob_data)
+            blob_client_instance = blob_client.get_blob_client(blob_name)
+
+            # Cheap metadata check before paying for the full download
+            etag = blob_client_instance.get_blob_properties().etag
+            if etag == get_stored_etag(blob_name, conn):
+                logging.info(f"Skipped {blob_name} (ETag unchanged)")
+                continue
+
+            blob_data, file_hash = download_with_hash(blob_client_instance)
 
             if not has_file_changed(blob_name, file_hash, conn):
+                # Remember the new ETag so the next run skips the download;
+                # ingestion_time stays put since nothing was ingested
+                etag_rows.append((etag, blob_name))
                 logging.info(f"Skipped {blob_name} (no change detected)")
                 continue
 
-            df = pd.read_csv(io.BytesIO(blob_data), sep=';')
+            column_types = STORE_CSV_TYPES if blob_name == "stores.csv" else None  # noqa: E501
+            df = read_csv_bytes(blob_data, column_types)
 
             # Transformations
             if blob_name == "stores.csv":
-                # Split coordinates
-                df['latlng'] = df['latlng'].str.strip('()')
-                df[["latitude", "longitude"]] = df["latlng"].str.split(",", expand=True).astype(float)  # noqa: E501
-                df = df.drop(columns=["latlng"])
+                # Split "(lat,lng)" coordinates in a single pass
+                coords = df.pop("latlng").str.extract(LATLNG_PATTERN).astype(float)  # noqa: E501
+                df["latitude"], df["longitude"] = coords[0], coords[1]
 
             # Load into SQLite
             df.to_sql(table_name, conn, if_exists="replace", index=False)
-            record_file_hash(blob_name, file_hash, conn)
+            hash_rows.append((blob_name, file_hash, datetime.now(), etag))
             logging.info(f"Loaded {len(df)} records into {table_name}")
 
         except Exception as e:
             logging.error(f"Error processing {blob_name}: {str(e)}")
 
+    if hash_rows or etag_rows:
+        record_file_hashes(hash_rows, conn)
+        record_file_etags(etag_rows, conn)
+        conn.commit()
 
-def process_transactions(blob_client, conn, transaction_date):
-    """Process transaction files for a specific date"""
-    # Check if data exists for the processing date
-    if date_check_in_transactions(conn, transaction_date):
-        logging.info(f"Existing transactions found for {transaction_date} - deleting before reprocessing")  # noqa: E501
-        delete_transactions(conn, transaction_date)
 
-    # Get account_id mapping
-    account_map = pd.read_sql("SELECT id, account_id FROM clients", conn)
-    account_dict = account_map.set_index('id')['account_id'].to_dict()
+def parse_transaction_file(blob_name, blob_data):
+    """Validate the header and parse one hourly transaction file"""
+    # Read the first line to check if it's a valid header
+    newline = blob_data.find(b"\n")
+    first_line = (blob_data if newline == -1 else blob_data[:newline]).rstrip(b"\r")  # noqa: E501
+    if first_line.startswith(b"#") or b"this file contains" in first_line.lower():  # noqa: E501
+        logging.error(f"Invalid header: first row appears to be a comment -> '{first_line.decode('utf-8', 'replace')}'")  # noqa: E501
+        raise ValueError(f"{blob_name} has an invalid header")
+
+    # If valid, continue to read CSV normally
+    df = read_csv_bytes(blob_data, TRANSACTION_CSV_TYPES)
 
-    all_transactions = []
-    for hour in range(8, 21):
-        blob_name = f"transactions_{transaction_date}_{hour}.csv"
+    # Shrink the integer columns to the smallest dtype that holds them
+    for col, col_type in TRANSACTION_CSV_TYPES.items():
+        if col_type == "int64":
+            df[col] = pd.to_numeric(df[col], downcast="integer")
+    return df
+
+
+def load_transaction_file(blob_client, blob_name, etag, blob_data):
+    """Parsed hourly file, read from the Parquet cache if blob_data is None"""
+    cache_path = transaction_cache_path(blob_name, etag)
+    if blob_data is None:
         try:
-            blob_client_instance = blob_client.get_blob_client(blob_name)
-            if blob_client_instance.exists():
-                # Download and read CSV
-                blob_data = blob_client_instance.download_blob().readall()
-
-                # Read the first line to check if it's a valid header
-                raw_text = blob_data.decode("utf-8")
-                first_line = raw_text.splitlines()[0]
-                if first_line.startswith("#") or "this file contains" in first_line.lower():  # noqa: E501
-                    logging.error(f"Invalid header: first row appears to be a comment -> '{first_line}'")  # noqa: E501
-                    raise ValueError(f"{blob_name} has an invalid header")
-
-                # If valid, continue to read CSV normally
-                df = pd.read_csv(io.BytesIO(blob_data), sep=';')
-
-                # Add account_id
-                df["account_id"] = df["client_id"].map(account_dict)
-
-                # Create timestamp
-                df["transaction_time"] = pd.to_datetime(
-                    df["date"] + " " +
-                    df["hour"].astype(str) + ":" +
-                    df["minute"].astype(str)
-                ).dt.strftime("%Y-%m-%d %H:%M:%S")
-
-                all_transactions.append(df)
-                logging.info(f"Processed {blob_name}: {len(df)} transactions")
+            return pq.read_table(cache_path).to_pandas()
         except Exception as e:
-            logging.error(f"Error processing {blob_name}: {str(e)}")
+            # Never drop the hour over a bad cache file: discard and re-fetch
+            logging.warning(f"Discarding unreadable cache for {blob_name}: {str(e)}")  # noqa: E501
+            if os.path.exists(cache_path):
+                os.remove(cache_path)
+            blob_data = blob_client.get_blob_client(blob_name).download_blob(max_concurrency=4).readall()  # noqa: E501
+
+    df = parse_transaction_file(blob_name, blob_data)
+    if pa is not None:
+        try:
+            os.makedirs(TRANSACTION_CACHE_DIR, exist_ok=True)
+            # Drop copies cached for older ETags of the same blob
+            for name in os.listdir(TRANSACTION_CACHE_DIR):
+                if name.startswith(f"{blob_name}.") and name.endswith(".parquet"):  # noqa: E501
+                    os.remove(os.path.join(TRANSACTION_CACHE_DIR, name))
+            # Write then rename so a crash never leaves a truncated file
+            pq.write_table(pa.Table.from_pandas(df, preserve_index=False), cache_path + ".tmp")  # noqa: E501
+            os.replace(cache_path + ".tmp", cache_path)
+        except Exception as e:
+            logging.warning(f"Could not cache {blob_name}: {str(e)}")
+    return df
+
 
-    if all_transactions:
-        final_df = pd.concat(all_transactions)
-        final_df["process_date"] = transaction_date
-        final_df = final_df[[
-            "transaction_id", "client_id", "product_id", "store_id",
-            "transaction_time", "quantity", "account_id", "process_date"
-        ]]
-
-        # Load into database
-        final_df.to_sql("transactions", conn, if_exists="append", index=False)
-        logging.info(f"Loaded {len(final_df)} transactions for {transaction_date}")  # noqa: E501
+def prepare_transactions(df, account_lookup, transaction_date):
+    """Add the derived columns of the transactions table"""
+    # Add account_id
+    df["account_id"] = lookup_account_ids(account_lookup, df["client_id"])
+
+    # Create timestamp; date is already YYYY-MM-DD so no parsing needed
+    df["transaction_time"] = (
+        df["date"] + " " +
+        df["hour"].str.zfill(2) + ":" +
+        df["minute"].str.zfill(2) + ":00"
+    )
+    df["process_date"] = transaction_date
+    return df
+
+
+def process_transactions(blob_client, conn, transaction_date, transaction_blobs):  # noqa: E501
+    """Process transaction files for a specific date"""
+    # Get account_id mapping
+    account_lookup = load_account_lookup(conn)
+
+    # Stage the day's rows, then swap them in within the same transaction
+    loaded_count = 0
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("""
+            CREATE TEMP TABLE transactions_stg (
+                transaction_id INTEGER,
+                client_id INTEGER,
+                product_id INTEGER,
+                store_id INTEGER,
+                transaction_time TEXT,
+                quantity INTEGER,
+                account_id TEXT,
+                process_date TEXT
+            )
+        """)
+
+        for blob_name, blob in transaction_blobs.items():
+            if blob is None:
+                continue
+            etag, blob_data = blob
+            try:
+                df = load_transaction_file(blob_client, blob_name, etag, blob_data)  # noqa: E501
+                df = prepare_transactions(df, account_lookup, transaction_date)
+            except Exception as e:
+                logging.error(f"Error processing {blob_name}: {str(e)}")
+                continue
+            finally:
+                # Release the raw bytes so only one file is held at a time
+                transaction_blobs[blob_name] = blob = blob_data = None
+
+            # tolist() yields native Python scalars that sqlite3 can bind
+            col_arrays = [df[col].to_numpy().tolist() for col in TRANSACTION_COLUMNS]  # noqa: E501
+            conn.executemany(INSERT_TX_SQL, zip(*col_arrays))
+            loaded_count += len(df)
+            logging.info(f"Processed {blob_name}: {len(df)} transactions")
+
+        # Only replace the day if something was staged; a run where every
+        # file failed must not wipe the data already loaded
+        if loaded_count:
+            # Check if data exists for the processing date
+            if date_check_in_transactions(conn, transaction_date):
+                logging.info(f"Existing transactions found for {transaction_date} - replacing them with the reprocessed data")  # noqa: E501
+                delete_transactions(conn, transaction_date)
+
+            # A transaction_id already used by another date fails here and
+            # rolls back the whole day
+            conn.execute(PUBLISH_TX_SQL)
+        conn.execute("DROP TABLE transactions_stg")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+    if loaded_count:
+        logging.info(f"Loaded {loaded_count} transactions for {transaction_date}")  # noqa: E501
     else:
-        logging.warning(f"No transactions found for {transaction_date}")
+        logging.warning(f"No transactions found for {transaction_date} - existing data left unchanged")  # noqa: E501
 
 
 def run_pipeline(process_date):
@@ -240,7 +538,12 @@ def run_pipeline(process_date):
     blob_client = blob_service.get_container_client(CONTAINER_NAME)
 
     # Set up SQLite database
-    conn = sqlite3.connect(DB_FILE)
+    conn = sqlite3.connect(DB_FILE, cached_statements=256)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-200000")
+    conn.execute("PRAGMA mmap_size=30000000000")
 
     try:
         # Database initialization
@@ -251,7 +554,8 @@ def run_pipeline(process_date):
 
         # Process transactions
         transaction_date = process_date.strftime("%Y-%m-%d")
-        process_transactions(blob_client, conn, transaction_date)
+        transaction_blobs = asyncio.run(fetch_transaction_blobs(transaction_date))  # noqa: E501
+        process_transactions(blob_client, conn, transaction_date, transaction_blobs)  # noqa: E501
 
         logging.info("Ingestion completed successfully")
 